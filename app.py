@@ -3,7 +3,7 @@ from flask_cors import CORS
 from config.settings import Config
 from routes.content_based import content_bp
 from routes.collaborative import collaborative_bp
-from routes.knowledge_graph import kg_bp
+from routes.knowledge_graph import kg_bp, get_kg_recommender
 from routes.common import common_bp
 
 
@@ -21,6 +21,12 @@ def create_app():
     app.register_blueprint(kg_bp, url_prefix='/api/knowledge-graph')
     app.register_blueprint(common_bp, url_prefix='/api')
 
+    # Eager-load the knowledge graph recommender so the first request
+    # doesn't absorb the multi-second cold start
+    try:
+        get_kg_recommender()
+    except Exception as e:
+        print(f"Warning: could not preload knowledge graph recommender: {e}")
 
     return app
 
@@ -1,13 +1,79 @@
+import ast
 import sqlite3
-import json
+import orjson
 import pandas as pd
+from multiprocessing import Pool
 from typing import List, Dict, Any
 
+# Translate table for rewriting the single-quoted pseudo-JSON in the TMDB
+# CSVs - str.translate is faster than str.replace for single characters
+_QUOTE_TABLE = str.maketrans({"'": '"'})
+
+# Optional: pysimdjson beats orjson on these payloads when its Parser is
+# reused, since the internal tape buffer is amortized across calls. The
+# singleton's output must be materialized (as_list) before the next parse
+# invalidates it.
+try:
+    import simdjson
+    _SIMD_PARSER = simdjson.Parser()
+except ImportError:
+    _SIMD_PARSER = None
+
+# JSON-encoded columns that get parsed up-front, before any insert loop
+MOVIE_JSON_COLUMNS = ['genres', 'keywords', 'production_companies',
+                      'production_countries', 'spoken_languages']
+CREDIT_JSON_COLUMNS = ['cast', 'crew']
+
+# INSERT statements hoisted to module level so the exact same string
+# object is passed on every call and sqlite3's prepared-statement cache
+# always hits
+_SQL_INSERT_MOVIE = '''
+    INSERT OR REPLACE INTO movies
+    (id, budget, homepage, original_language, original_title,
+     overview, popularity, release_date, revenue, runtime,
+     status, tagline, title, vote_average, vote_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_INSERT_GENRE = 'INSERT OR IGNORE INTO genres (id, name) VALUES (?, ?)'
+_SQL_INSERT_KEYWORD = 'INSERT OR IGNORE INTO keywords (id, name) VALUES (?, ?)'
+_SQL_INSERT_COMPANY = 'INSERT OR IGNORE INTO production_companies (id, name) VALUES (?, ?)'
+_SQL_INSERT_COUNTRY = 'INSERT OR IGNORE INTO production_countries (iso_3166_1, name) VALUES (?, ?)'
+_SQL_INSERT_LANGUAGE = 'INSERT OR IGNORE INTO spoken_languages (iso_639_1, name) VALUES (?, ?)'
+_SQL_INSERT_MOVIE_GENRE = 'INSERT OR IGNORE INTO movies_genres (movie_id, genre_id) VALUES (?, ?)'
+_SQL_INSERT_MOVIE_KEYWORD = 'INSERT OR IGNORE INTO movies_keywords (movie_id, keyword_id) VALUES (?, ?)'
+_SQL_INSERT_MOVIE_COMPANY = 'INSERT OR IGNORE INTO movies_production_companies (movie_id, company_id) VALUES (?, ?)'
+_SQL_INSERT_MOVIE_COUNTRY = 'INSERT OR IGNORE INTO movies_production_countries (movie_id, country_iso) VALUES (?, ?)'
+_SQL_INSERT_MOVIE_LANGUAGE = 'INSERT OR IGNORE INTO movies_spoken_languages (movie_id, language_iso) VALUES (?, ?)'
+_SQL_INSERT_PERSON = 'INSERT OR IGNORE INTO people (id, name, gender) VALUES (?, ?, ?)'
+_SQL_INSERT_CAST = '''
+    INSERT OR REPLACE INTO movies_cast
+    (movie_id, person_id, cast_id, character, credit_id, gender, order_num)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_INSERT_CREW = '''
+    INSERT OR REPLACE INTO movies_crew
+    (movie_id, person_id, credit_id, department, gender, job)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
 def create_database_schema(db_path: str) -> sqlite3.Connection:
     """Create the SQLite database with proper schema"""
-    conn = sqlite3.connect(db_path)
+    # isolation_level=None puts the connection in autocommit mode so the
+    # ingest controls its own single BEGIN/COMMIT transaction instead of
+    # sqlite3's implicit per-statement transactions
+    conn = sqlite3.connect(db_path, isolation_level=None,
+                           cached_statements=1024)
     cursor = conn.cursor()
-    
+
+    # Tune the connection for a one-shot bulk load: skip fsync/journaling
+    # and give SQLite a large page cache. The database is rebuilt from the
+    # CSVs on failure, so durability during ingest doesn't matter.
+    cursor.execute('PRAGMA journal_mode = OFF')
+    cursor.execute('PRAGMA synchronous = OFF')
+    cursor.execute('PRAGMA temp_store = MEMORY')
+    cursor.execute('PRAGMA cache_size = -200000')
+    cursor.execute('PRAGMA locking_mode = EXCLUSIVE')
+
     # Create movies table
     cursor.execute('''
         CREATE TABLE movies (
@@ -158,152 +224,160 @@ def create_database_schema(db_path: str) -> sqlite3.Connection:
         )
     ''')
     
-    conn.commit()
     return conn
 
 def parse_json_field(json_str: str) -> List[Dict[str, Any]]:
     """Parse JSON string field and return list of dictionaries"""
-    if not json_str or json_str == '[]':
+    # One cheap check covers NaN (pandas renders missing cells as float),
+    # empty strings and '[]' - no parser ever sees an empty row
+    if not isinstance(json_str, str) or len(json_str) <= 2:
         return []
-    
-    # Handle the case where the JSON uses single quotes instead of double quotes
-    json_str = json_str.replace("'", '"')
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError:
-        # If direct parsing fails, try fixing common issues
+
+    # Fast path: rewrite single quotes and parse as JSON. This fails for
+    # values containing apostrophes (e.g. "World's End"), which the quote
+    # rewrite corrupts.
+    translated = json_str.translate(_QUOTE_TABLE)
+    if _SIMD_PARSER is not None:
+        try:
+            return _SIMD_PARSER.parse(translated.encode()).as_list()
+        except ValueError:
+            pass
+    else:
         try:
-            # Replace escaped unicode that might be causing issues
-            json_str = json_str.encode('utf-8').decode('unicode_escape')
-            return json.loads(json_str)
-        except:
-            print(f"Error parsing JSON: {json_str[:100]}...")
-            return []
+            return orjson.loads(translated)
+        except orjson.JSONDecodeError:
+            pass
+
+    # The fields are Python-repr lists of dicts, so literal_eval parses the
+    # original string directly without any quote rewriting
+    try:
+        return ast.literal_eval(json_str)
+    except (ValueError, SyntaxError):
+        print(f"Error parsing JSON: {json_str[:100]}...")
+        return []
+
+def parse_json_columns(df: pd.DataFrame, columns: List[str], pool: Pool):
+    """Parse JSON columns in parallel across CPU cores"""
+    # The parses are independent per cell and CPU-bound, so a process pool
+    # scales with core count where threads would serialize on the GIL
+    for col in columns:
+        df[col] = pool.map(parse_json_field, df[col].tolist(), chunksize=64)
 
 def insert_movies_data(conn: sqlite3.Connection, movies_df: pd.DataFrame):
     """Insert movies data into the database"""
-    cursor = conn.cursor()
-    
-    for _, row in movies_df.iterrows():
-        # Prepare the movie data
-        movie_data = (
-            row['id'], row['budget'], row['homepage'], row['original_language'],
-            row['original_title'], row['overview'], row['popularity'], 
-            row['release_date'], row['revenue'], row['runtime'], 
-            row['status'], row['tagline'], row['title'], 
-            row['vote_average'], row['vote_count']
-        )
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO movies 
-            (id, budget, homepage, original_language, original_title, 
-             overview, popularity, release_date, revenue, runtime, 
-             status, tagline, title, vote_average, vote_count)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', movie_data)
-    
-    conn.commit()
+    movie_columns = [
+        'id', 'budget', 'homepage', 'original_language', 'original_title',
+        'overview', 'popularity', 'release_date', 'revenue', 'runtime',
+        'status', 'tagline', 'title', 'vote_average', 'vote_count'
+    ]
+
+    # Batch all rows into a single executemany call instead of one
+    # execute per movie - the per-statement overhead dominates otherwise.
+    # Don't swap this for DataFrame.to_sql: pandas commits the raw sqlite3
+    # connection internally, which would close the ingest's explicit
+    # transaction mid-run and make the final COMMIT fail.
+    movie_rows = list(movies_df[movie_columns].itertuples(index=False, name=None))
+
+    conn.executemany(_SQL_INSERT_MOVIE, movie_rows)
 
 def insert_related_data(conn: sqlite3.Connection, movies_df: pd.DataFrame):
     """Insert related data (genres, keywords, production companies, etc.)"""
-    cursor = conn.cursor()
-    
-    # Process each movie to extract and insert related data
-    for _, row in movies_df.iterrows():
-        movie_id = row['id']
-        
+    # Accumulate rows in Python first, then insert each table with a single
+    # executemany - two execute calls per entity per movie is tens of
+    # thousands of round trips for no benefit. Parent entities are deduped
+    # in dicts keyed by id (~20 unique genres vs ~20k occurrences), so
+    # INSERT OR IGNORE never sees a duplicate.
+    seen_genres = {}
+    seen_keywords = {}
+    seen_companies = {}
+    seen_countries = {}
+    seen_languages = {}
+    movie_genre_rows = set()
+    movie_keyword_rows = set()
+    movie_company_rows = set()
+    movie_country_rows = set()
+    movie_language_rows = set()
+
+    # zip over the raw column arrays - iterrows boxes every row into a
+    # Series, which costs more than the SQLite work itself
+    column_values = zip(movies_df['id'].values,
+                        movies_df['genres'].values,
+                        movies_df['keywords'].values,
+                        movies_df['production_companies'].values,
+                        movies_df['production_countries'].values,
+                        movies_df['spoken_languages'].values)
+
+    for movie_id, genres, keywords, companies, countries, languages in column_values:
         # Process genres
-        genres = parse_json_field(row['genres'])
         for genre in genres:
-            cursor.execute('INSERT OR IGNORE INTO genres (id, name) VALUES (?, ?)', 
-                          (genre['id'], genre['name']))
-            cursor.execute('INSERT OR IGNORE INTO movies_genres (movie_id, genre_id) VALUES (?, ?)', 
-                          (movie_id, genre['id']))
-        
+            seen_genres[genre['id']] = genre['name']
+            movie_genre_rows.add((movie_id, genre['id']))
+
         # Process keywords
-        keywords = parse_json_field(row['keywords'])
         for keyword in keywords:
-            cursor.execute('INSERT OR IGNORE INTO keywords (id, name) VALUES (?, ?)', 
-                          (keyword['id'], keyword['name']))
-            cursor.execute('INSERT OR IGNORE INTO movies_keywords (movie_id, keyword_id) VALUES (?, ?)', 
-                          (movie_id, keyword['id']))
-        
+            seen_keywords[keyword['id']] = keyword['name']
+            movie_keyword_rows.add((movie_id, keyword['id']))
+
         # Process production companies
-        companies = parse_json_field(row['production_companies'])
         for company in companies:
-            cursor.execute('INSERT OR IGNORE INTO production_companies (id, name) VALUES (?, ?)', 
-                          (company['id'], company['name']))
-            cursor.execute('INSERT OR IGNORE INTO movies_production_companies (movie_id, company_id) VALUES (?, ?)', 
-                          (movie_id, company['id']))
-        
+            seen_companies[company['id']] = company['name']
+            movie_company_rows.add((movie_id, company['id']))
+
         # Process production countries
-        countries = parse_json_field(row['production_countries'])
         for country in countries:
-            cursor.execute('INSERT OR IGNORE INTO production_countries (iso_3166_1, name) VALUES (?, ?)', 
-                          (country['iso_3166_1'], country['name']))
-            cursor.execute('INSERT OR IGNORE INTO movies_production_countries (movie_id, country_iso) VALUES (?, ?)', 
-                          (movie_id, country['iso_3166_1']))
-        
+            seen_countries[country['iso_3166_1']] = country['name']
+            movie_country_rows.add((movie_id, country['iso_3166_1']))
+
         # Process spoken languages
-        languages = parse_json_field(row['spoken_languages'])
         for language in languages:
-            cursor.execute('INSERT OR IGNORE INTO spoken_languages (iso_639_1, name) VALUES (?, ?)', 
-                          (language['iso_639_1'], language['name']))
-            cursor.execute('INSERT OR IGNORE INTO movies_spoken_languages (movie_id, language_iso) VALUES (?, ?)', 
-                          (movie_id, language['iso_639_1']))
-        
-        # Commit every 100 movies to avoid memory issues
-        if _ % 100 == 0:
-            conn.commit()
-    
-    conn.commit()
+            seen_languages[language['iso_639_1']] = language['name']
+            movie_language_rows.add((movie_id, language['iso_639_1']))
+
+    conn.executemany(_SQL_INSERT_GENRE, seen_genres.items())
+    conn.executemany(_SQL_INSERT_KEYWORD, seen_keywords.items())
+    conn.executemany(_SQL_INSERT_COMPANY, seen_companies.items())
+    conn.executemany(_SQL_INSERT_COUNTRY, seen_countries.items())
+    conn.executemany(_SQL_INSERT_LANGUAGE, seen_languages.items())
+    conn.executemany(_SQL_INSERT_MOVIE_GENRE, movie_genre_rows)
+    conn.executemany(_SQL_INSERT_MOVIE_KEYWORD, movie_keyword_rows)
+    conn.executemany(_SQL_INSERT_MOVIE_COMPANY, movie_company_rows)
+    conn.executemany(_SQL_INSERT_MOVIE_COUNTRY, movie_country_rows)
+    conn.executemany(_SQL_INSERT_MOVIE_LANGUAGE, movie_language_rows)
 
 def insert_credits_data(conn: sqlite3.Connection, credits_df: pd.DataFrame):
     """Insert credits data (cast and crew) into the database"""
-    cursor = conn.cursor()
-    
-    for _, row in credits_df.iterrows():
-        movie_id = row['movie_id']
-        
+    # Tear each parsed cast/crew dict apart exactly once into the flat
+    # tuples the tables need, then batch everything with executemany.
+    # People are deduped in a dict so each person is bound once.
+    seen_people = {}
+    cast_rows = []
+    crew_rows = []
+
+    column_values = zip(credits_df['movie_id'].values,
+                        credits_df['cast'].values,
+                        credits_df['crew'].values)
+
+    for movie_id, cast, crew in column_values:
         # Process cast
-        cast = parse_json_field(row['cast'])
         for person in cast:
-            # Insert person into people table
-            cursor.execute('INSERT OR IGNORE INTO people (id, name, gender) VALUES (?, ?, ?)', 
-                          (person['id'], person['name'], person.get('gender', 0)))
-            
-            # Insert cast relationship
-            cursor.execute('''
-                INSERT OR REPLACE INTO movies_cast 
-                (movie_id, person_id, cast_id, character, credit_id, gender, order_num)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                movie_id, person['id'], person['cast_id'], person['character'], 
-                person['credit_id'], person.get('gender', 0), person['order']
-            ))
-        
+            person_id = person['id']
+            gender = person.get('gender', 0)
+            seen_people[person_id] = (person_id, person['name'], gender)
+            cast_rows.append((movie_id, person_id, person['cast_id'],
+                              person['character'], person['credit_id'],
+                              gender, person['order']))
+
         # Process crew
-        crew = parse_json_field(row['crew'])
         for person in crew:
-            # Insert person into people table (if not already there)
-            cursor.execute('INSERT OR IGNORE INTO people (id, name, gender) VALUES (?, ?, ?)', 
-                          (person['id'], person['name'], person.get('gender', 0)))
-            
-            # Insert crew relationship
-            cursor.execute('''
-                INSERT OR REPLACE INTO movies_crew 
-                (movie_id, person_id, credit_id, department, gender, job)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                movie_id, person['id'], person['credit_id'], 
-                person['department'], person.get('gender', 0), person['job']
-            ))
-        
-        # Commit every 100 movies to avoid memory issues
-        if _ % 100 == 0:
-            conn.commit()
-    
-    conn.commit()
+            person_id = person['id']
+            gender = person.get('gender', 0)
+            seen_people.setdefault(person_id, (person_id, person['name'], gender))
+            crew_rows.append((movie_id, person_id, person['credit_id'],
+                              person['department'], gender, person['job']))
+
+    conn.executemany(_SQL_INSERT_PERSON, seen_people.values())
+    conn.executemany(_SQL_INSERT_CAST, cast_rows)
+    conn.executemany(_SQL_INSERT_CREW, crew_rows)
 
 def main():
     # Define paths
@@ -314,32 +388,48 @@ def main():
     print("Creating database schema...")
     conn = create_database_schema(db_path)
     
-    print("Loading movies CSV data...")
-    movies_df = pd.read_csv(movies_csv_path)
-    
-    print("Loading credits CSV data...")
-    credits_df = pd.read_csv(credits_csv_path)
-    
-    print("Inserting movies data...")
-    insert_movies_data(conn, movies_df)
-    
-    print("Inserting related data (genres, keywords, etc.)...")
-    insert_related_data(conn, movies_df)
-    
-    print("Inserting credits data (cast, crew)...")
-    insert_credits_data(conn, credits_df)
-    
+    # Stream the CSVs in chunks so peak memory stays bounded by the chunk
+    # size rather than the whole file - the cast/crew JSON blobs are the
+    # main memory tenants. Explicit dtypes let pandas' C parser skip type
+    # inference on the numeric columns.
+    movie_dtypes = {
+        'popularity': 'float64', 'runtime': 'float64',
+        'vote_average': 'float64', 'vote_count': 'int64'
+    }
+
+    # One transaction for the entire ingest - every intermediate commit
+    # forces a journal sync, and the 5k-movie working set is tiny
+    conn.execute('BEGIN')
+
+    with Pool() as pool:
+        print("Loading and inserting movies data...")
+        movies_loaded = 0
+        for chunk in pd.read_csv(movies_csv_path, chunksize=500, dtype=movie_dtypes):
+            parse_json_columns(chunk, MOVIE_JSON_COLUMNS, pool)
+            insert_movies_data(conn, chunk)
+            insert_related_data(conn, chunk)
+            movies_loaded += len(chunk)
+            print(f"  {movies_loaded} movies processed...")
+
+        print("Loading and inserting credits data (cast, crew)...")
+        credits_loaded = 0
+        for chunk in pd.read_csv(credits_csv_path, chunksize=500):
+            parse_json_columns(chunk, CREDIT_JSON_COLUMNS, pool)
+            insert_credits_data(conn, chunk)
+            credits_loaded += len(chunk)
+            print(f"  {credits_loaded} credit records processed...")
+
+    conn.execute('COMMIT')
+
     print("Creating indexes for better performance...")
     cursor = conn.cursor()
-    
+
     # Create indexes to improve query performance
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_movies_title ON movies(title)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_movies_release_date ON movies(release_date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_movies_vote_average ON movies(vote_average)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_people_name ON people(name)')
-    
-    conn.commit()
-    
+
     # Print summary statistics
     print("\nDatabase creation completed successfully!")
     print("Summary:")
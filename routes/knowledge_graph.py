@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+import functools
 import sys
 import os
 from pathlib import Path
@@ -8,7 +9,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from utils.knowledge_graph.kg_recommender import KnowledgeGraphRecommender
-from utils.common import convert_numpy_types
+from utils.common import ojson
 from config.settings import Config
 
 kg_bp = Blueprint('knowledge_graph', __name__)
@@ -32,6 +33,40 @@ def get_kg_recommender():
             raise Exception(f"Failed to initialize knowledge graph recommender: {e}")
     return kg_recommender
 
+def _clamp_n(default: int = 10, lo: int = 1, hi: int = 50) -> int:
+    """解析并钳制n参数到[lo, hi]，避免werkzeug基于异常的type=int慢路径"""
+    value = request.args.get('n')
+    if value is None or not value.isdigit():
+        return default
+    return max(lo, min(hi, int(value)))
+
+# 热门关键词/电影会被重复请求，用LRU缓存把重复命中变成字典查找
+# （图谱初始化后是只读的，缓存不会失效）
+@functools.lru_cache(maxsize=4096)
+def _cached_keyword_recommend(keyword: str, n: int) -> tuple:
+    """缓存的关键词推荐"""
+    return tuple(get_kg_recommender().recommend_by_keyword(keyword, n))
+
+@functools.lru_cache(maxsize=4096)
+def _cached_similar_recommend(movie_title: str, n: int) -> tuple:
+    """缓存的相似电影推荐"""
+    return tuple(get_kg_recommender().recommend_similar_movies(movie_title, n))
+
+@functools.lru_cache(maxsize=4096)
+def _cached_recommendation_details(movie_ids: tuple) -> list:
+    """缓存的推荐详情（按movie_id元组缓存）"""
+    return get_kg_recommender().get_recommendation_details(list(movie_ids))
+
+@functools.lru_cache(maxsize=1024)
+def _cached_movie_details(movie_title: str):
+    """缓存的电影详情"""
+    return get_kg_recommender().get_movie_details(movie_title)
+
+@functools.lru_cache(maxsize=1024)
+def _cached_search(query: str, limit: int) -> list:
+    """缓存的电影搜索"""
+    return get_kg_recommender().search_movies(query, limit)
+
 @kg_bp.route('/recommend-keyword', methods=['GET'])
 def recommend_by_keyword():
     """
@@ -44,26 +79,22 @@ def recommend_by_keyword():
     try:
         keyword = request.args.get('keyword')
         if not keyword:
-            return jsonify({"error": "Missing required parameter: keyword"}), 400
+            return ojson({"error": "Missing required parameter: keyword"}, 400)
 
-        n = request.args.get('n', type=int, default=10)
-        if n <= 0 or n > 50:
-            return jsonify({"error": "Parameter n must be between 1 and 50"}), 400
+        n = _clamp_n()
 
-        rec = get_kg_recommender()
-        movie_ids = rec.recommend_by_keyword(keyword, n)
+        movie_ids = _cached_keyword_recommend(keyword, n)
 
         if not movie_ids:
-            return jsonify({
+            return ojson({
                 "keyword": keyword,
                 "error": "No movies found matching the keyword",
                 "suggestions": "Try different keywords like: director name, actor name, genre, or movie theme"
-            }), 404
+            }, 404)
 
-        recommendations = rec.get_recommendation_details(movie_ids)
-        recommendations = convert_numpy_types(recommendations)
+        recommendations = _cached_recommendation_details(movie_ids)
 
-        return jsonify({
+        return ojson({
             "keyword": keyword,
             "recommendations": recommendations,
             "count": len(recommendations),
@@ -71,7 +102,7 @@ def recommend_by_keyword():
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/recommend-similar', methods=['GET'])
 def recommend_similar_movies():
@@ -85,44 +116,39 @@ def recommend_similar_movies():
     try:
         movie_title = request.args.get('movie')
         if not movie_title:
-            return jsonify({"error": "Missing required parameter: movie"}), 400
+            return ojson({"error": "Missing required parameter: movie"}, 400)
 
-        n = request.args.get('n', type=int, default=10)
-        if n <= 0 or n > 50:
-            return jsonify({"error": "Parameter n must be between 1 and 50"}), 400
-
-        rec = get_kg_recommender()
+        n = _clamp_n()
 
         # 首先检查电影是否存在
-        movie_details = rec.get_movie_details(movie_title)
+        movie_details = _cached_movie_details(movie_title)
         if not movie_details:
             # 尝试搜索相似的标题
-            search_results = rec.search_movies(movie_title, limit=5)
+            search_results = _cached_search(movie_title, 5)
             if search_results:
-                return jsonify({
+                return ojson({
                     "movie": movie_title,
                     "error": "Movie not found exactly",
                     "suggestions": search_results
-                }), 404
+                }, 404)
             else:
-                return jsonify({
+                return ojson({
                     "movie": movie_title,
                     "error": "Movie not found"
-                }), 404
+                }, 404)
 
-        movie_ids = rec.recommend_similar_movies(movie_title, n)
+        movie_ids = _cached_similar_recommend(movie_title, n)
 
         if not movie_ids:
-            return jsonify({
+            return ojson({
                 "movie": movie_title,
                 "error": "No similar movies found",
                 "original_movie": movie_details
-            }), 404
+            }, 404)
 
-        recommendations = rec.get_recommendation_details(movie_ids)
-        recommendations = convert_numpy_types(recommendations)
+        recommendations = _cached_recommendation_details(movie_ids)
 
-        return jsonify({
+        return ojson({
             "movie": movie_title,
             "original_movie": movie_details,
             "similar_movies": recommendations,
@@ -131,7 +157,7 @@ def recommend_similar_movies():
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/search', methods=['GET'])
 def search_movies():
@@ -145,16 +171,13 @@ def search_movies():
     try:
         query = request.args.get('q')
         if not query:
-            return jsonify({"error": "Missing required parameter: q"}), 400
+            return ojson({"error": "Missing required parameter: q"}, 400)
 
-        n = request.args.get('n', type=int, default=10)
-        if n <= 0 or n > 50:
-            return jsonify({"error": "Parameter n must be between 1 and 50"}), 400
+        n = _clamp_n()
 
-        rec = get_kg_recommender()
-        results = rec.search_movies(query, n)
+        results = _cached_search(query, n)
 
-        return jsonify({
+        return ojson({
             "query": query,
             "results": results,
             "count": len(results),
@@ -162,7 +185,7 @@ def search_movies():
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/details', methods=['GET'])
 def movie_details():
@@ -175,25 +198,21 @@ def movie_details():
     try:
         movie_title = request.args.get('movie')
         if not movie_title:
-            return jsonify({"error": "Missing required parameter: movie"}), 400
+            return ojson({"error": "Missing required parameter: movie"}, 400)
 
-        rec = get_kg_recommender()
-        details = rec.get_movie_details(movie_title)
+        details = _cached_movie_details(movie_title)
 
         if not details:
-            return jsonify({"error": f"Movie not found: {movie_title}"}), 404
+            return ojson({"error": f"Movie not found: {movie_title}"}, 404)
 
-        # Convert numpy types to Python native types
-        details = convert_numpy_types(details)
-
-        return jsonify({
+        return ojson({
             "movie": movie_title,
             "details": details,
             "method": "knowledge_graph"
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/random', methods=['GET'])
 def random_movies():
@@ -204,21 +223,19 @@ def random_movies():
     - n: 推荐数量 (可选，默认为10)
     """
     try:
-        n = request.args.get('n', type=int, default=10)
-        if n <= 0 or n > 50:
-            return jsonify({"error": "Parameter n must be between 1 and 50"}), 400
+        n = _clamp_n()
 
         rec = get_kg_recommender()
         random_movies = rec.get_random_movies(n)
 
-        return jsonify({
+        return ojson({
             "random_movies": random_movies,
             "count": len(random_movies),
             "method": "knowledge_graph_random"
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/info', methods=['GET'])
 def system_info():
@@ -229,13 +246,13 @@ def system_info():
         rec = get_kg_recommender()
         info = rec.get_system_info()
 
-        return jsonify({
+        return ojson({
             "knowledge_graph_system": info,
             "method": "knowledge_graph"
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/graph-stats', methods=['GET'])
 def graph_statistics():
@@ -246,13 +263,13 @@ def graph_statistics():
         rec = get_kg_recommender()
         stats = rec.knowledge_graph.get_graph_info()
 
-        return jsonify({
+        return ojson({
             "graph_statistics": stats,
             "method": "knowledge_graph"
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @kg_bp.route('/multi-recommend', methods=['POST'])
 def multi_recommend():
@@ -267,34 +284,29 @@ def multi_recommend():
     try:
         data = request.get_json()
         if not data:
-            return jsonify({"error": "Missing request body"}), 400
+            return ojson({"error": "Missing request body"}, 400)
 
         keywords = data.get('keywords', [])
         movie = data.get('movie')
         n = data.get('n', 10)
 
         if not keywords and not movie:
-            return jsonify({
+            return ojson({
                 "error": "Must provide either keywords or movie for recommendation"
-            }), 400
+            }, 400)
 
         if n <= 0 or n > 50:
-            return jsonify({"error": "Parameter n must be between 1 and 50"}), 400
+            return ojson({"error": "Parameter n must be between 1 and 50"}, 400)
 
         rec = get_kg_recommender()
         recommendations = []
 
-        # 基于关键词推荐
+        # 基于关键词推荐（单次图谱遍历处理所有关键词）
         if keywords:
-            keyword_results = []
-            for keyword in keywords:
-                movie_ids = rec.recommend_by_keyword(keyword, n)
-                if movie_ids:
-                    keyword_results.extend(movie_ids)
-
-            if keyword_results:
-                # 去重并限制数量
-                unique_movie_ids = list(set(keyword_results))[:n]
+            movie_ids = rec.recommend_by_keywords(keywords, n)
+            if movie_ids:
+                # dict.fromkeys去重并保持评分顺序
+                unique_movie_ids = list(dict.fromkeys(movie_ids))[:n]
                 recommendations = rec.get_recommendation_details(unique_movie_ids)
 
         # 基于电影推荐
@@ -303,9 +315,8 @@ def multi_recommend():
             if movie_ids:
                 recommendations = rec.get_recommendation_details(movie_ids)
 
-        recommendations = convert_numpy_types(recommendations)
 
-        return jsonify({
+        return ojson({
             "request": {
                 "keywords": keywords,
                 "movie": movie,
@@ -317,5 +328,5 @@ def multi_recommend():
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
@@ -1,6 +1,29 @@
 """Common utility functions for the Movie Recommendation API."""
 
 import numpy as np
+import orjson
+from flask import Response
+
+
+def ojson(data, status=200):
+    """
+    Serialize a response payload with orjson and wrap it in a Flask Response.
+
+    orjson handles numpy scalars and arrays natively (OPT_SERIALIZE_NUMPY),
+    so callers don't need a convert_numpy_types pre-pass over the payload.
+
+    Args:
+        data: JSON-serializable payload (may contain numpy types)
+        status: HTTP status code for the response
+
+    Returns:
+        flask.Response with application/json content
+    """
+    return Response(
+        orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
 
 
 def convert_numpy_types(obj):
@@ -15,6 +15,11 @@ class IMDbDataManager:
     _instance = None
     _imdb_data = None
     _initialized = False
+    _title_to_idx = None
+    _titles_lower = None
+    _titles_lower_series = None
+    _imdb_records = None
+    _imdb_lookup_df = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -31,14 +36,40 @@ class IMDbDataManager:
             self._imdb_data = pd.read_csv(imdb_file_path)
             logger.info(f"IMDb data loaded successfully from {imdb_file_path}")
             logger.info(f"IMDb data shape: {self._imdb_data.shape}")
+            self._build_title_index()
             self._initialized = True
             return True
         except Exception as e:
             logger.warning(f"Could not load IMDb data: {e}")
             self._imdb_data = pd.DataFrame(columns=['title', 'imdb_url', 'img_url'])
+            self._build_title_index()
             self._initialized = True
             return False
 
+    def _build_title_index(self):
+        """预构建小写标题索引，使精确查找从O(N)扫描变成O(1)字典探测"""
+        # 小写转换只做一次，Series留给子串回退的向量化contains用
+        self._titles_lower_series = self._imdb_data['title'].astype(str).str.lower()
+        self._titles_lower = self._titles_lower_series.tolist()
+        # 重复标题保留首条（setdefault不覆盖已有键），与旧实现的iloc[0]
+        # 和批量查找表的keep='first'取同一行
+        self._title_to_idx = {}
+        for i, title in enumerate(self._titles_lower):
+            self._title_to_idx.setdefault(title, i)
+        # 预先展开成普通字典列表，取行时避免.iloc的开销
+        self._imdb_records = [
+            {'imdb_url': row.get('imdb_url'), 'poster_url': row.get('img_url')}
+            for row in self._imdb_data.to_dict('records')
+        ]
+        # 预构建用于批量merge的查找表（按小写标题去重，保留首条，与iloc[0]一致）
+        self._imdb_lookup_df = (
+            self._imdb_data
+            .assign(_key=self._titles_lower)
+            .rename(columns={'img_url': 'poster_url'})
+            [['_key', 'imdb_url', 'poster_url']]
+            .drop_duplicates(subset='_key', keep='first')
+        )
+
     def get_imdb_info(self, movie_title: str) -> Optional[Dict]:
         """
         获取电影的IMDb和海报信息
@@ -49,34 +80,36 @@ class IMDbDataManager:
         Returns:
             包含imdb_url和poster_url的字典，或None
         """
-        if not self._initialized or self._imdb_data is None or self._imdb_data.empty:
+        if not self._initialized or not self._imdb_records:
             return None
 
         try:
-            # 尝试精确匹配
-            imdb_row = self._imdb_data[self._imdb_data['title'].str.lower() == movie_title.lower()]
-
-            if imdb_row.empty:
-                # 尝试部分匹配
-                imdb_row = self._imdb_data[self._imdb_data['title'].str.contains(movie_title, case=False, na=False)]
-
-            if not imdb_row.empty:
-                row = imdb_row.iloc[0]
-                return {
-                    'imdb_url': row.get('imdb_url'),
-                    'poster_url': row.get('img_url')
-                }
+            title_lower = movie_title.lower()
+
+            # 精确匹配：单次哈希查找
+            idx = self._title_to_idx.get(title_lower)
+
+            if idx is None:
+                # 部分匹配回退：regex=False走纯C子串匹配，列已预先小写，
+                # 既不编译正则也不逐行做大小写折叠
+                mask = self._titles_lower_series.str.contains(
+                    title_lower, regex=False, na=False)
+                idx = int(mask.values.argmax()) if mask.any() else None
+
+            if idx is not None:
+                return dict(self._imdb_records[idx])
             return None
         except Exception as e:
             logger.error(f"Error getting IMDb info for {movie_title}: {e}")
             return None
 
-    def enhance_movie_data(self, movie_data: Dict) -> Dict:
+    def enhance_movie_data(self, movie_data: Dict, copy: bool = True) -> Dict:
         """
         增强电影数据，添加IMDb和海报链接
 
         Args:
             movie_data: 原始电影数据字典
+            copy: 为False时原地更新传入字典，省去每部电影一次字典拷贝
 
         Returns:
             增强后的电影数据字典
@@ -84,7 +117,7 @@ class IMDbDataManager:
         if not movie_data:
             return movie_data
 
-        enhanced_data = movie_data.copy()
+        enhanced_data = movie_data.copy() if copy else movie_data
         title = movie_data.get('title')
 
         if title:
@@ -99,6 +132,22 @@ class IMDbDataManager:
 
         return enhanced_data
 
+    def enhance_movie_iter(self, movie_list):
+        """
+        流式增强电影数据：按需逐条产出，不物化整份增强后的列表
+
+        适合只迭代一次的消费方（JSON序列化、分页），峰值内存
+        保持在单条记录级别。
+
+        Args:
+            movie_list: 电影数据字典可迭代对象
+
+        Yields:
+            增强后的电影数据字典
+        """
+        for movie_data in movie_list:
+            yield self.enhance_movie_data(movie_data)
+
     def enhance_movie_list(self, movie_list: list) -> list:
         """
         增强电影列表，为每部电影添加IMDb和海报链接
@@ -112,11 +161,25 @@ class IMDbDataManager:
         if not movie_list:
             return movie_list
 
-        enhanced_list = []
-        for movie_data in movie_list:
-            enhanced_list.append(self.enhance_movie_data(movie_data))
-
-        return enhanced_list
+        # 无标题或IMDb数据未加载时退回逐条处理
+        if (self._imdb_lookup_df is None or self._imdb_lookup_df.empty or
+                not all(isinstance(m, dict) and m.get('title') for m in movie_list)):
+            return [self.enhance_movie_data(movie_data) for movie_data in movie_list]
+
+        # 单次左连接代替逐条O(N)查找：一次C级哈希join完成整批增强
+        df = pd.DataFrame(movie_list)
+        df['_key'] = df['title'].astype(str).str.lower()
+        # 输入若已带这两个键，merge会给列名加_x/_y后缀；与逐条路径的
+        # update覆盖语义一致，先去掉旧列让join结果直接落到原列名上
+        df = df.drop(columns=['imdb_url', 'poster_url'], errors='ignore')
+        merged = df.merge(self._imdb_lookup_df, on='_key', how='left')
+        merged = merged.drop(columns='_key')
+        # 未命中的行把NaN换成None，且只动join进来的两列：整列where会把
+        # 电影数据自身的NaN也改掉，而float列上的where根本填不进None
+        for col in ('imdb_url', 'poster_url'):
+            merged[col] = merged[col].astype(object).where(merged[col].notna(), None)
+
+        return merged.to_dict('records')
 
     @property
     def is_loaded(self) -> bool:
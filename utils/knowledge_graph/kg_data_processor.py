@@ -1,10 +1,43 @@
 import pandas as pd
+import numpy as np
+import logging
 import os
 import ast
+import orjson
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
 import sys
 from typing import Optional, Dict, Any
 
+logger = logging.getLogger(__name__)
+
+# 可选的zstd压缩：处理好的DataFrame带着Python列表列，pickle动辄上百MB，
+# 压缩后加载的瓶颈从磁盘I/O变成解压（数GB/s）；未安装时退回无压缩
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# 可选的pyarrow CSV读取：多线程C++解析器，比pd.read_csv快数倍且峰值内存更低；
+# 未安装时退回pandas并用usecols做同样的列裁剪
+try:
+    import pyarrow.csv as pv
+except ImportError:
+    pv = None
+
+# 知识图谱只用到这些列，读取时直接裁剪掉其余列
+_MOVIE_COLUMNS = ['id', 'title', 'genres', 'keywords', 'release_date',
+                  'vote_average', 'vote_count', 'popularity', 'production_companies']
+_CREDIT_COLUMNS = ['movie_id', 'cast', 'crew']
+
+# TMDB导出里的JSON列是Python repr风格的单引号，先整串换成双引号
+# 走orjson的C解析器，包含撇号等会破坏引号替换的少数单元格再退回ast
+_QUOTE_TABLE = str.maketrans({"'": '"'})
+
 
 class KGDataProcessor:
     """知识图谱数据处理器"""
@@ -15,7 +48,7 @@ class KGDataProcessor:
         self.movies_file = os.path.join(self.data_directory, "tmdb_5000_movies.csv")
         self.credits_file = os.path.join(self.data_directory, "tmdb_5000_credits.csv")
         self.processed_data_file = os.path.join(self.data_directory, "kg_processed_data.pkl")
-        self.kg_model_file = os.path.join(self.data_directory, "kg_model.pkl")
+        self.kg_model_file = os.path.join(self.data_directory, "kg_model.npz")
 
     def load_and_process_data(self) -> Optional[pd.DataFrame]:
         """加载并处理数据用于知识图谱构建"""
@@ -23,7 +56,13 @@ class KGDataProcessor:
             # 检查是否已有处理好的数据
             if os.path.exists(self.processed_data_file):
                 print("Loading pre-processed knowledge graph data...")
-                return pd.read_pickle(self.processed_data_file)
+                with open(self.processed_data_file, 'rb') as f:
+                    if zstd is not None and f.read(4) == _ZSTD_MAGIC:
+                        f.seek(0)
+                        with zstd.ZstdDecompressor().stream_reader(f) as reader:
+                            return pickle.load(reader)
+                    f.seek(0)
+                    return pickle.load(f)
 
             # 检查原始数据文件
             if not os.path.exists(self.movies_file):
@@ -32,111 +71,181 @@ class KGDataProcessor:
                 raise FileNotFoundError(f"Credits data file not found: {self.credits_file}")
 
             print("Loading movies data...")
-            movies_df = pd.read_csv(self.movies_file)
+            movies_df = self._read_csv(self.movies_file, _MOVIE_COLUMNS)
             print(f"Loaded {len(movies_df)} movies")
 
             print("Loading credits data...")
-            credits_df = pd.read_csv(self.credits_file)
+            credits_df = self._read_csv(self.credits_file, _CREDIT_COLUMNS)
             print(f"Loaded {len(credits_df)} credits")
 
             print("Merging data...")
             # 合并数据
             merged_df = movies_df.merge(credits_df, left_on='id', right_on='movie_id', how='inner')
 
+            # 统一标题列名：下游只认'title'，不再做title_x/title的防御分支
+            # （常规路径凭证表已不带title列，这里只为兼容带后缀的旧数据）
+            if 'title_x' in merged_df.columns:
+                merged_df = (merged_df.rename(columns={'title_x': 'title'})
+                             .drop(columns=['title_y'], errors='ignore'))
+
             print("Processing knowledge graph features...")
-            processed_df = self._process_kg_features(merged_df)
+            processed_df = self._process_features_parallel(merged_df)
 
             # 保存处理好的数据
             print("Saving processed data...")
-            processed_df.to_pickle(self.processed_data_file)
+            with open(self.processed_data_file, 'wb') as f:
+                if zstd is not None:
+                    with zstd.ZstdCompressor(level=3).stream_writer(f) as writer:
+                        pickle.dump(processed_df, writer, protocol=pickle.HIGHEST_PROTOCOL)
+                else:
+                    pickle.dump(processed_df, f, protocol=pickle.HIGHEST_PROTOCOL)
 
             print(f"Processed {len(processed_df)} records for knowledge graph")
             return processed_df
 
         except Exception as e:
-            print(f"Error processing knowledge graph data: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error processing knowledge graph data: %s", e)
             return None
 
+    def _read_csv(self, filepath: str, columns: list) -> pd.DataFrame:
+        """读取CSV并只保留所需列"""
+        if pv is not None:
+            table = pv.read_csv(
+                filepath,
+                convert_options=pv.ConvertOptions(include_columns=columns))
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        return pd.read_csv(filepath, usecols=columns)
+
+    def _process_features_parallel(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """按行块并行处理知识图谱特征
+
+        解析热点orjson.loads整个解析期间都持有GIL，线程池并行不了
+        这类工作；与csv_to_sqlite一样用进程池，按核心数真正并行。
+        """
+        n_workers = os.cpu_count() or 1
+        if n_workers <= 1 or len(df) < 1000:
+            return self._process_kg_features(df)
+
+        # 按行号区间iloc切块：np.array_split在新版pandas上对DataFrame
+        # 返回的是ndarray而非DataFrame；copy避免在视图上赋新列
+        bounds = np.linspace(0, len(df), n_workers + 1, dtype=int)
+        chunks = [df.iloc[lo:hi].copy() for lo, hi in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(self._process_kg_features, chunks))
+
+        if any(result is None for result in results):
+            return None
+        return pd.concat(results, ignore_index=True)
+
     def _process_kg_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """处理知识图谱特征"""
-        # 解析JSON格式的特征
-        df['genres_parsed'] = df['genres'].apply(self._parse_json_list)
-        df['keywords_parsed'] = df['keywords'].apply(self._parse_json_list)
-        df['cast_parsed'] = df['cast'].apply(self._parse_json_list)
-        df['crew_parsed'] = df['crew'].apply(self._parse_json_list)
-        df['production_companies_parsed'] = df['production_companies'].apply(self._parse_json_list)
-
-        # 提取导演
-        df['directors'] = df['crew_parsed'].apply(self._extract_directors)
-
-        # 提取年份
-        df['year'] = df['release_date'].apply(self._extract_year)
-
-        # 过滤掉必要字段为空的记录
-        # 合并后的数据框有title_x和title_y列
-        title_col = 'title_x' if 'title_x' in df.columns else 'title'
-        id_col = 'id' if 'id' in df.columns else 'movie_id' if 'movie_id' in df.columns else 'id'
-
-        # 检查列是否存在
-        if title_col not in df.columns:
-            print(f"Warning: No title column found. Available columns: {list(df.columns)}")
-            return None
-        if id_col not in df.columns:
-            print(f"Warning: No ID column found. Available columns: {list(df.columns)}")
+        # 解析JSON格式的特征（按列批量解析，避免逐单元格的apply开销）
+        df['genres_parsed'] = self._parse_name_column(df['genres'])
+        df['keywords_parsed'] = self._parse_name_column(df['keywords'])
+        df['cast_parsed'] = self._parse_name_column(df['cast'])
+        df['production_companies_parsed'] = self._parse_name_column(df['production_companies'])
+
+        # crew解析与导演提取融合成单趟（见_parse_crew_column）
+        df['crew_parsed'], df['directors'] = self._parse_crew_column(df['crew'])
+
+        # 提取年份：一次向量化的to_datetime代替逐单元格apply，
+        # 未知年份记0，得到可直接参与相似度数值计算的int16列
+        df['year'] = (pd.to_datetime(df['release_date'], errors='coerce')
+                      .dt.year.fillna(0).astype('int16'))
+
+        # 过滤掉必要字段为空的记录（标题列在merge后已统一为title）
+        if 'title' not in df.columns or 'id' not in df.columns:
+            print(f"Warning: Required columns missing. Available columns: {list(df.columns)}")
             return None
 
-        df = df.dropna(subset=[title_col, id_col])
-        df = df[df[title_col].str.strip() != '']
+        df = df.dropna(subset=['title', 'id'])
+        df = df[df['title'].str.strip() != '']
 
         return df
 
-    def _parse_json_list(self, json_str) -> list:
-        """解析JSON格式的字符串列表"""
-        if pd.isna(json_str) or json_str == '' or json_str == '[]':
-            return []
-        try:
-            data = ast.literal_eval(json_str)
+    def _parse_name_column(self, col: pd.Series) -> list:
+        """按列解析JSON字符串列表并在同一趟里提取name
+
+        orjson.loads比逐单元格的ast.literal_eval快一个数量级以上，
+        整列一个紧凑循环跑完，不再为每个单元格走一次apply调度。
+        """
+        parsed = []
+        append = parsed.append
+        for json_str in col.tolist():
+            # NaN、空串和'[]'都直接给空列表
+            if not isinstance(json_str, str) or len(json_str) <= 2:
+                append([])
+                continue
+            try:
+                data = orjson.loads(json_str.translate(_QUOTE_TABLE))
+            except Exception:
+                try:
+                    data = ast.literal_eval(json_str)
+                except Exception:
+                    append([])
+                    continue
             if isinstance(data, list):
-                return [item['name'] for item in data if isinstance(item, dict) and 'name' in item]
-            return []
-        except Exception as e:
-            return []
-
-    def _extract_directors(self, crew_list) -> list:
-        """从工作人员列表中提取导演"""
-        if not crew_list:
-            return []
+                # 同一类型/演员名在几千部电影里反复出现，intern后去重成
+                # 单个字符串对象，省内存且后续set哈希可走指针相等捷径
+                append([sys.intern(item['name']) for item in data
+                        if isinstance(item, dict) and 'name' in item])
+            else:
+                append([])
+        return parsed
+
+    def _parse_crew_column(self, col: pd.Series) -> tuple:
+        """按列解析crew并在同一趟里提取导演
+
+        旧实现先把crew解析成纯名字列表，再在名字列表上找job=='Director'，
+        但job信息在第一步就被丢掉了，导演列因此永远为空；融合成单趟
+        既省掉一次全列遍历，也顺带修复了这个问题。
+        """
+        crew_names = []
         directors = []
-        for person in crew_list:
-            if isinstance(person, dict) and person.get('job') == 'Director':
-                name = person.get('name', '')
-                if name:
-                    directors.append(name)
-        return directors
-
-    def _extract_year(self, date_str) -> str:
-        """从日期字符串中提取年份"""
-        if pd.isna(date_str) or date_str == '':
-            return 'Unknown'
-        try:
-            return str(date_str).split('-')[0]
-        except:
-            return 'Unknown'
+        for json_str in col.tolist():
+            if not isinstance(json_str, str) or len(json_str) <= 2:
+                crew_names.append([])
+                directors.append([])
+                continue
+            try:
+                data = orjson.loads(json_str.translate(_QUOTE_TABLE))
+            except Exception:
+                try:
+                    data = ast.literal_eval(json_str)
+                except Exception:
+                    crew_names.append([])
+                    directors.append([])
+                    continue
+            names = []
+            row_directors = []
+            if isinstance(data, list):
+                for item in data:
+                    if not isinstance(item, dict):
+                        continue
+                    name = item.get('name')
+                    if not name:
+                        continue
+                    name = sys.intern(name)
+                    names.append(name)
+                    if item.get('job') == 'Director':
+                        row_directors.append(name)
+            crew_names.append(names)
+            directors.append(row_directors)
+        return crew_names, directors
 
     def get_data_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
         """获取数据摘要"""
         if df is None or df.empty:
             return {}
 
+        # chain.from_iterable流式去重，不先物化一份包含所有出现次数的大列表
         summary = {
             'total_movies': len(df),
-            'total_genres': len(set([genre for sublist in df['genres_parsed'] for genre in sublist])),
-            'total_directors': len(set([director for sublist in df['directors'] for director in sublist])),
-            'total_actors': len(set([actor for sublist in df['cast_parsed'] for actor in sublist])),
-            'total_keywords': len(set([keyword for sublist in df['keywords_parsed'] for keyword in sublist])),
-            'year_range': f"{df['year'].min()}-{df['year'].max()}" if 'year' in df.columns else 'Unknown',
+            'total_genres': len(set(chain.from_iterable(df['genres_parsed']))),
+            'total_directors': len(set(chain.from_iterable(df['directors']))),
+            'total_actors': len(set(chain.from_iterable(df['cast_parsed']))),
+            'total_keywords': len(set(chain.from_iterable(df['keywords_parsed']))),
+            'year_range': f"{int(df['year'].min())}-{int(df['year'].max())}" if 'year' in df.columns else 'Unknown',
             'avg_rating': df['vote_average'].mean() if 'vote_average' in df.columns else 0,
             'avg_popularity': df['popularity'].mean() if 'popularity' in df.columns else 0
         }
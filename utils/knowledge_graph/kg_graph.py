@@ -1,18 +1,71 @@
 import networkx as nx
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from collections import defaultdict
 from typing import Optional, Dict, List, Any, Tuple
-import pickle
 import os
+import re
+import sys
+
+# 电影节点ID末尾的整数部分，预编译后单趟匹配
+_MOVIE_ID_RE = re.compile(r'movie_(\d+)$')
+
+
+def _top_n_indices(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """按分数降序取前N个下标
+
+    argpartition先做O(N)的选择，再只对N个候选排序——
+    top_n远小于电影总数时比整列argsort省一个log(N)因子。
+    """
+    if top_n >= scores.size:
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, top_n)[:top_n]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def _year_similarity_vec(years: np.ndarray, year: int) -> np.ndarray:
+    """年份相似度的数值内核：整批年份一次算完
+
+    年份差距在5年内认为相似；年份解析在构建时完成（见_build_movie_matrix），
+    内核只做纯数值运算，未知年份（0）记为不相似。
+    """
+    if year <= 0:
+        return np.zeros(years.size, dtype=np.float32)
+    similarity = np.maximum(0, 1 - np.abs(years.astype(np.float32) - year) / 10)
+    similarity[years == 0] = 0
+    return similarity
 
 
 class KnowledgeGraph:
     """知识图谱构建和管理"""
 
+    # 节点ID清理用的转换表：一次C级translate代替四次str.replace
+    _SANITIZE_TABLE = str.maketrans({' ': '_', '/': '_', '-': '_', ':': '_'})
+
+    # 关键词打分时各特征类型的权重
+    _FEATURE_WEIGHTS = {'director': 1.5, 'genre': 1.0, 'actor': 0.8, 'keyword': 0.6}
+
+    # 节点类型→详情字段名
+    _FEATURE_BUCKETS = {'genre': 'genres', 'director': 'directors', 'actor': 'actors',
+                        'keyword': 'keywords', 'company': 'companies'}
+
     def __init__(self):
         self.graph = nx.Graph()
         self.node_types = defaultdict(list)
         self.initialized = False
+        self._sanitize_cache = {}
+        # 查询用的扁平结构，由_finalize_for_query填充
+        self._adj = {}
+        self._node_attrs = {}
+        self._node_search = []
+        self._movie_title_index = {}
+        self._movie_title_list = []
+        self._movie_feature_names = {}
+        self.movie_node_to_int_id = {}
+        self._search_records = []
+        self._adj_structures_built = False
+        self._graph_info_cache = None
 
     def build_graph_from_data(self, df: pd.DataFrame):
         """从处理好的数据构建知识图谱"""
@@ -21,56 +74,67 @@ class KnowledgeGraph:
 
         print("Building knowledge graph from processed data...")
 
-        for _, row in df.iterrows():
-            movie_id = f"movie_{row['id']}"
-            # 处理合并后的数据框中的标题列
-            title_col = 'title_x' if 'title_x' in df.columns else 'title'
-            movie_title = str(row.get(title_col, 'Unknown'))
+        n_rows = len(df)
+
+        def _column(col):
+            return df[col].tolist() if col in df.columns else [None] * n_rows
+
+        # 每列只提取一次底层数组，循环中按位置索引——iterrows把每一行
+        # 装箱成Series，每列一次对象分配，构图时间几乎都耗在这上面
+        ids = df['id'].tolist()
+        titles = df['title'].astype(str).tolist()
+        years = _column('year')
+        ratings = _column('vote_average')
+        popularities = _column('popularity')
+        vote_counts = _column('vote_count')
+        genres_col = _column('genres_parsed')
+        directors_col = _column('directors')
+        cast_col = _column('cast_parsed')
+        keywords_col = _column('keywords_parsed')
+        companies_col = _column('production_companies_parsed')
+
+        for i in range(n_rows):
+            movie_id = f"movie_{ids[i]}"
 
             # 添加电影节点
             self.graph.add_node(movie_id,
                                type='movie',
-                               title=movie_title,
-                               year=str(row.get('year', 'Unknown')),
-                               rating=float(row.get('vote_average', 0)),
-                               popularity=float(row.get('popularity', 0)),
-                               vote_count=int(row.get('vote_count', 0)))
+                               title=titles[i],
+                               year=str(years[i]) if years[i] else 'Unknown',
+                               rating=float(ratings[i] or 0),
+                               popularity=float(popularities[i] or 0),
+                               vote_count=int(vote_counts[i] or 0))
 
             # 添加类型节点和关系
-            genres = row.get('genres_parsed', [])
-            for genre in genres[:5]:  # 限制类型数量
+            for genre in (genres_col[i] or [])[:5]:  # 限制类型数量
                 if genre:
                     genre_id = f"genre_{self._sanitize_name(genre)}"
                     self.graph.add_node(genre_id, type='genre', name=genre)
                     self.graph.add_edge(movie_id, genre_id, relation='has_genre')
 
             # 添加导演节点和关系
-            directors = row.get('directors', [])
-            for director in directors[:3]:  # 限制导演数量
+            for director in (directors_col[i] or [])[:3]:  # 限制导演数量
                 if director:
                     director_id = f"director_{self._sanitize_name(director)}"
                     self.graph.add_node(director_id, type='director', name=director)
                     self.graph.add_edge(movie_id, director_id, relation='directed_by')
 
             # 添加演员节点和关系
-            cast = row.get('cast_parsed', [])
-            for actor in cast[:5]:  # 限制演员数量
+            for actor in (cast_col[i] or [])[:5]:  # 限制演员数量
                 if actor:
                     actor_id = f"actor_{self._sanitize_name(actor)}"
                     self.graph.add_node(actor_id, type='actor', name=actor)
                     self.graph.add_edge(movie_id, actor_id, relation='starring')
 
             # 添加关键词节点和关系
-            keywords = row.get('keywords_parsed', [])
-            for keyword in keywords[:5]:  # 限制关键词数量
+            for keyword in (keywords_col[i] or [])[:5]:  # 限制关键词数量
                 if keyword:
                     keyword_id = f"keyword_{self._sanitize_name(keyword)}"
                     self.graph.add_node(keyword_id, type='keyword', name=keyword)
                     self.graph.add_edge(movie_id, keyword_id, relation='has_keyword')
 
             # 添加制作公司节点和关系
-            companies = row.get('production_companies_parsed', [])
-            for company in companies[:3]:  # 限制制作公司数量
+            for company in (companies_col[i] or [])[:3]:  # 限制制作公司数量
                 if company:
                     company_id = f"company_{self._sanitize_name(company)}"
                     self.graph.add_node(company_id, type='company', name=company)
@@ -80,13 +144,19 @@ class KnowledgeGraph:
 
         # 统计节点类型
         self._categorize_nodes()
+        self._finalize_for_query()
         self.initialized = True
 
         return True
 
     def _sanitize_name(self, name: str) -> str:
-        """清理名称用于创建节点ID"""
-        return str(name).replace(' ', '_').replace('/', '_').replace('-', '_').replace(':', '_')[:50]
+        """清理名称用于创建节点ID（同名实体在多部电影中重复出现，结果做缓存）"""
+        sanitized = self._sanitize_cache.get(name)
+        if sanitized is None:
+            # intern后同一实体在所有节点ID引用间共享一个字符串对象
+            sanitized = sys.intern(str(name).translate(self._SANITIZE_TABLE)[:50])
+            self._sanitize_cache[name] = sanitized
+        return sanitized
 
     def _categorize_nodes(self):
         """分类节点"""
@@ -99,178 +169,290 @@ class KnowledgeGraph:
         for node_type, nodes in self.node_types.items():
             print(f"  {node_type}: {len(nodes)} nodes")
 
-    def find_movies_by_keyword(self, keyword: str, top_n: int = 10) -> List[str]:
-        """根据关键词查找电影"""
-        if not self.initialized:
-            return []
-
-        keyword = keyword.lower()
-        movie_scores = []
-
-        # 查找匹配的节点
-        matching_nodes = []
-        for node, attrs in self.graph.nodes(data=True):
-            if (attrs.get('type') in ['movie', 'genre', 'director', 'actor', 'keyword'] and
-                keyword in str(attrs.get('title', '')).lower() or
-                keyword in str(attrs.get('name', '')).lower()):
-                matching_nodes.append(node)
-
-        # 为每个电影计算相关性分数
+    def _finalize_for_query(self):
+        """从NetworkX图提取查询用的扁平结构
+
+        NetworkX把邻接和属性存成嵌套字典，每次.nodes[n]/.neighbors(n)
+        都要经过方法分发；热查询路径改走普通dict和frozenset。
+        """
+        self._node_attrs = {node: dict(attrs) for node, attrs in self.graph.nodes(data=True)}
+        self._adj = {node: frozenset(self.graph.adj[node]) for node in self.graph.nodes}
+        self._build_query_indexes()
+
+    def _build_query_indexes(self):
+        """从_node_attrs/_adj构建派生索引（加载npz时不经过NetworkX直接调用）"""
+        # 关键词匹配用的(节点, 小写文本)列表：小写转换只在此做一次，
+        # 匹配时剩下纯C级的子串判断
+        self._node_search = [
+            (node, str(attrs.get('title') or attrs.get('name') or '').lower())
+            for node, attrs in self._node_attrs.items()
+            if attrs.get('type') in ('movie', 'genre', 'director', 'actor', 'keyword')
+        ]
+        # 电影节点→整数ID的映射：标准化输出每次都要这个数字，
+        # 在这里解析一次，调用方不再反复split字符串
+        self.movie_node_to_int_id = {}
+        match = _MOVIE_ID_RE.match
+        for node in self.node_types.get('movie', []):
+            m = match(node)
+            self.movie_node_to_int_id[node] = int(m.group(1)) if m else None
+        # 小写标题→电影节点的索引：精确查找O(1)，子串回退扫普通列表；
+        # 同一趟预构建标准化搜索记录，search_movies返回共享引用即可，
+        # 每次请求不再重建字典
+        self._movie_title_index = {}
+        self._movie_title_list = []
+        self._search_records = []
+        for node, attrs in self._node_attrs.items():
+            if attrs.get('type') == 'movie':
+                # casefold比lower多覆盖一些非ASCII大小写折叠；键去掉首尾空白
+                title_norm = str(attrs.get('title', '')).casefold()
+                self._movie_title_index.setdefault(title_norm.strip(), node)
+                self._movie_title_list.append((title_norm, node))
+                self._search_records.append({
+                    'movie_id': self.movie_node_to_int_id.get(node),
+                    'title': attrs.get('title', 'Unknown'),
+                    'year': attrs.get('year', 'Unknown'),
+                    'rating': attrs.get('rating', 0),
+                    'popularity': attrs.get('popularity', 0),
+                    'vote_count': attrs.get('vote_count', 0),
+                    'type': 'knowledge_graph_search'
+                })
+        # 依赖邻接的重结构推迟到第一次真正需要它们的查询
+        # （只用搜索/标题查找的部署完全不用付这份构建成本和内存）
+        self._adj_structures_built = False
+        self._graph_info_cache = None
+
+    def _ensure_adjacency_structures(self):
+        """按需构建依赖邻接的查询结构（特征分桶和电影×特征矩阵）"""
+        if self._adj_structures_built:
+            return
+        # 每部电影的邻居按类型预先分桶，详情查询从if梯子变成字典合并
+        self._movie_feature_names = {}
+        for node in self.node_types.get('movie', []):
+            buckets = {'genres': [], 'directors': [], 'actors': [], 'keywords': [], 'companies': []}
+            for neighbor in self._adj.get(node, ()):
+                neighbor_attrs = self._node_attrs[neighbor]
+                bucket = self._FEATURE_BUCKETS.get(neighbor_attrs.get('type'))
+                name = neighbor_attrs.get('name')
+                if bucket and name:
+                    buckets[bucket].append(name)
+            self._movie_feature_names[node] = buckets
+        self._build_movie_matrix()
+        self._adj_structures_built = True
+
+    def _build_movie_matrix(self):
+        """构建电影×特征稀疏矩阵及配套数组
+
+        相似度查询从逐部电影的集合运算变成一次稀疏矩阵-向量乘，
+        交集/并集/评分/年份全部按数组一次算完。
+        """
         movie_nodes = self.node_types.get('movie', [])
+        self._movie_nodes = movie_nodes
+        self._movie_index = {node: i for i, node in enumerate(movie_nodes)}
+
+        feature_index = {}
+        rows = []
+        cols = []
+        for i, movie_node in enumerate(movie_nodes):
+            for feature in self._adj.get(movie_node, ()):
+                j = feature_index.get(feature)
+                if j is None:
+                    j = len(feature_index)
+                    feature_index[feature] = j
+                rows.append(i)
+                cols.append(j)
+
+        n_movies = len(movie_nodes)
+        n_features = max(len(feature_index), 1)
+        self._movie_feat = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(n_movies, n_features))
+        self._movie_sizes = np.asarray(self._movie_feat.getnnz(axis=1), dtype=np.float32)
+
+        # 数值属性按SoA存成对齐的连续数组，查询时做整列数组运算，
+        # 不再对每部电影做四次字典查找
+        ratings = []
+        popularities = []
+        vote_counts = []
+        years = []
         for movie_node in movie_nodes:
-            score = self._calculate_movie_score(movie_node, matching_nodes)
-            if score > 0:
-                movie_data = self.graph.nodes[movie_node]
-                # 综合分数：相关性分数 + 评分 + 流行度
-                relevance_score = score
-                rating = movie_data.get('rating', 0) / 10  # 归一化到0-1
-                popularity = min(movie_data.get('popularity', 0) / 100, 1)  # 归一化到0-1
-                vote_count = min(movie_data.get('vote_count', 0) / 1000, 1)  # 归一化到0-1
-
-                final_score = relevance_score * 0.5 + rating * 0.3 + popularity * 0.1 + vote_count * 0.1
-                movie_scores.append((movie_node, final_score))
-
-        # 排序并返回前N个
-        movie_scores.sort(key=lambda x: x[1], reverse=True)
-        return [movie_id for movie_id, _ in movie_scores[:top_n]]
+            attrs = self._node_attrs[movie_node]
+            ratings.append(attrs.get('rating', 0) or 0)
+            popularities.append(attrs.get('popularity', 0) or 0)
+            vote_counts.append(attrs.get('vote_count', 0) or 0)
+            try:
+                years.append(int(str(attrs.get('year', '0'))[:4]))
+            except ValueError:
+                years.append(0)
+        self._movie_ratings = np.asarray(ratings, dtype=np.float32)
+        self._movie_popularity = np.asarray(popularities, dtype=np.float32)
+        self._movie_vote_counts = np.asarray(vote_counts, dtype=np.float32)
+        self._movie_years = np.asarray(years, dtype=np.int16)
+
+    def find_movies_by_keyword(self, keyword: str, top_n: int = 10) -> List[str]:
+        """根据关键词查找电影"""
+        return self.find_movies_by_keywords([keyword], top_n)
+
+    def find_movies_by_keywords(self, keywords: List[str], top_n: int = 10) -> List[str]:
+        """根据多个关键词查找电影（单次遍历图谱，电影只评分一次）"""
+        return [self._movie_nodes[i]
+                for i in self.find_movies_by_keywords_indices(keywords, top_n)]
+
+    def find_movies_by_keywords_indices(self, keywords: List[str], top_n: int = 10) -> np.ndarray:
+        """根据多个关键词查找电影，返回内部电影下标的int32数组
+
+        打分管线全程SoA数组，到这里也不落回Python列表；
+        需要节点ID的调用方用find_movies_by_keywords包装。
+        """
+        if not self.initialized or not keywords:
+            return np.empty(0, dtype=np.int32)
+
+        self._ensure_adjacency_structures()
+        keywords = [keyword.lower() for keyword in keywords]
+
+        # 一次遍历预建的搜索列表收集所有关键词的匹配节点
+        # （旧实现的and/or优先级问题会让公司等无关类型也被匹配进来，
+        # 这里只对白名单类型的标题/名称做子串匹配）
+        matching_nodes = [
+            node for node, text in self._node_search
+            if any(keyword in text for keyword in keywords)
+        ]
+
+        # 相关性分数累加到电影数组上：从匹配节点出发沿邻接走到电影，
+        # 只触碰实际相关的电影，而不是对全部电影逐一打分
+        relevance = np.zeros(len(self._movie_nodes), dtype=np.float32)
+        movie_index = self._movie_index
+        for matching_node in matching_nodes:
+            node_type = self._node_attrs[matching_node].get('type')
+            if node_type == 'movie':
+                # 直接匹配
+                idx = movie_index.get(matching_node)
+                if idx is not None:
+                    relevance[idx] += 2.0
+                continue
+            # 不同类型特征给予不同权重
+            weight = self._FEATURE_WEIGHTS.get(node_type)
+            if not weight:
+                continue
+            for movie_node in self._adj.get(matching_node, ()):
+                idx = movie_index.get(movie_node)
+                if idx is not None:
+                    relevance[idx] += weight
+
+        # 综合分数：相关性分数 + 评分 + 流行度（各分量归一化到0-1后整列算完）
+        final_score = (relevance * 0.5 +
+                       self._movie_ratings / 10 * 0.3 +
+                       np.minimum(self._movie_popularity / 100, 1) * 0.1 +
+                       np.minimum(self._movie_vote_counts / 1000, 1) * 0.1)
+        final_score[relevance <= 0] = -np.inf
+
+        # 选出前N个（O(N)的argpartition，不做整列排序）
+        order = _top_n_indices(final_score, top_n)
+        return order[final_score[order] > -np.inf].astype(np.int32)
 
     def find_similar_movies(self, movie_title: str, top_n: int = 10) -> List[str]:
         """根据电影标题查找相似电影"""
+        return [self._movie_nodes[i]
+                for i in self.find_similar_movie_indices(movie_title, top_n)]
+
+    def find_similar_movie_indices(self, movie_title: str, top_n: int = 10) -> np.ndarray:
+        """根据电影标题查找相似电影，返回内部电影下标的int32数组"""
         if not self.initialized:
-            return []
+            return np.empty(0, dtype=np.int32)
 
         movie_node = self.find_movie_by_title(movie_title)
         if not movie_node:
-            return []
+            return np.empty(0, dtype=np.int32)
 
-        # 获取该电影的所有特征
-        movie_features = set(self.graph.neighbors(movie_node))
-        movie_data = self.graph.nodes[movie_node]
+        self._ensure_adjacency_structures()
+        idx = self._movie_index.get(movie_node)
+        if idx is None:
+            return np.empty(0, dtype=np.int32)
 
-        similar_movies = []
-        movie_nodes = self.node_types.get('movie', [])
+        # 一次稀疏矩阵-向量乘得到与所有电影的特征交集大小
+        query_row = self._movie_feat.getrow(idx)
+        intersection = self._movie_feat.dot(query_row.T).toarray().ravel()
+        union = self._movie_sizes + self._movie_sizes[idx] - intersection
 
-        for other_movie in movie_nodes:
-            if other_movie == movie_node:
-                continue
+        # Jaccard相似度
+        jaccard_similarity = np.divide(intersection, union,
+                                       out=np.zeros_like(intersection),
+                                       where=union > 0)
 
-            # 计算特征相似度
-            other_features = set(self.graph.neighbors(other_movie))
-            common_features = movie_features.intersection(other_features)
+        # 评分相似度
+        rating_similarity = 1 - np.abs(self._movie_ratings - self._movie_ratings[idx]) / 10
 
-            if len(common_features) > 0:
-                # Jaccard相似度
-                jaccard_similarity = len(common_features) / len(movie_features.union(other_features))
+        # 年份相似度
+        year_similarity = _year_similarity_vec(self._movie_years, int(self._movie_years[idx]))
 
-                # 评分相似度
-                other_data = self.graph.nodes[other_movie]
-                rating_similarity = 1 - abs(movie_data.get('rating', 0) - other_data.get('rating', 0)) / 10
+        # 综合相似度
+        combined_similarity = (jaccard_similarity * 0.6 +
+                               rating_similarity * 0.2 +
+                               year_similarity * 0.2)
 
-                # 年份相似度
-                year_similarity = self._calculate_year_similarity(
-                    movie_data.get('year', '0'), other_data.get('year', '0')
-                )
+        # 只保留有共同特征的电影，并排除自身
+        combined_similarity[intersection == 0] = -np.inf
+        combined_similarity[idx] = -np.inf
 
-                # 综合相似度
-                combined_similarity = (jaccard_similarity * 0.6 +
-                                     rating_similarity * 0.2 +
-                                     year_similarity * 0.2)
-
-                similar_movies.append((other_movie, combined_similarity))
-
-        # 排序并返回前N个
-        similar_movies.sort(key=lambda x: x[1], reverse=True)
-        return [movie_id for movie_id, _ in similar_movies[:top_n]]
-
-    def _calculate_movie_score(self, movie_node: str, matching_nodes: List[str]) -> float:
-        """计算电影与匹配节点的相关性分数"""
-        if not matching_nodes:
-            return 0
-
-        movie_neighbors = set(self.graph.neighbors(movie_node))
-        score = 0
-
-        # 直接匹配
-        if movie_node in matching_nodes:
-            score += 2.0
-
-        # 特征匹配
-        for matching_node in matching_nodes:
-            if matching_node in movie_neighbors:
-                node_type = self.graph.nodes[matching_node].get('type')
-                # 不同类型特征给予不同权重
-                if node_type == 'director':
-                    score += 1.5
-                elif node_type == 'genre':
-                    score += 1.0
-                elif node_type == 'actor':
-                    score += 0.8
-                elif node_type == 'keyword':
-                    score += 0.6
-
-        return score
-
-    def _calculate_year_similarity(self, year1: str, year2: str) -> float:
-        """计算年份相似度"""
-        try:
-            y1 = int(str(year1)[:4])
-            y2 = int(str(year2)[:4])
-            year_diff = abs(y1 - y2)
-            # 年份差距在5年内认为相似
-            return max(0, 1 - year_diff / 10)
-        except:
-            return 0
+        # 选出前N个（O(N)的argpartition，不做整列排序）
+        order = _top_n_indices(combined_similarity, top_n)
+        return order[combined_similarity[order] > -np.inf].astype(np.int32)
 
     def find_movie_by_title(self, title: str) -> Optional[str]:
-        """根据标题查找电影节点"""
-        title_lower = title.lower()
-        for node, attrs in self.graph.nodes(data=True):
-            if (attrs.get('type') == 'movie' and
-                title_lower in str(attrs.get('title', '')).lower()):
-                return node
-        return None
+        """根据标题查找电影节点（归一化后精确命中走字典，子串匹配作回退）"""
+        title_norm = title.casefold()
+        node = self._movie_title_index.get(title_norm.strip())
+        if node is not None:
+            return node
+        return self._fuzzy_title_fallback(title_norm)
+
+    def _fuzzy_title_fallback(self, title_norm: str) -> Optional[str]:
+        """精确标题未命中时的子串回退"""
+        return next((node for t, node in self._movie_title_list if title_norm in t), None)
 
     def get_movie_details(self, movie_id: str) -> Optional[Dict[str, Any]]:
-        """获取电影详细信息"""
-        if movie_id not in self.graph.nodes:
+        """获取电影详细信息（相关特征取finalize时预分好的类型桶）"""
+        attrs = self._node_attrs.get(movie_id)
+        if attrs is None:
             return None
 
-        movie_data = dict(self.graph.nodes[movie_id])
-
-        # 获取相关特征
-        neighbors = list(self.graph.neighbors(movie_id))
-        movie_data['genres'] = []
-        movie_data['directors'] = []
-        movie_data['actors'] = []
-        movie_data['keywords'] = []
-        movie_data['companies'] = []
-
-        for neighbor in neighbors:
-            neighbor_attrs = self.graph.nodes[neighbor]
-            neighbor_type = neighbor_attrs.get('type')
-            neighbor_name = neighbor_attrs.get('name', '')
-
-            if neighbor_type == 'genre' and neighbor_name:
-                movie_data['genres'].append(neighbor_name)
-            elif neighbor_type == 'director' and neighbor_name:
-                movie_data['directors'].append(neighbor_name)
-            elif neighbor_type == 'actor' and neighbor_name:
-                movie_data['actors'].append(neighbor_name)
-            elif neighbor_type == 'keyword' and neighbor_name:
-                movie_data['keywords'].append(neighbor_name)
-            elif neighbor_type == 'company' and neighbor_name:
-                movie_data['companies'].append(neighbor_name)
-
-        return movie_data
+        self._ensure_adjacency_structures()
+        buckets = self._movie_feature_names.get(movie_id)
+        if buckets is None:
+            buckets = {'genres': [], 'directors': [], 'actors': [], 'keywords': [], 'companies': []}
+        return {**attrs, **buckets}
+
+    def get_movie_details_batch(self, movie_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """批量获取电影详细信息（结果与movie_ids逐一对应，未知ID为None）
+
+        单次调用处理整批ID，属性表和特征桶的查找都绑定成局部变量，
+        省去每个ID一次方法分发。
+        """
+        self._ensure_adjacency_structures()
+        node_attrs = self._node_attrs
+        feature_names = self._movie_feature_names
+        results = []
+        for movie_id in movie_ids:
+            attrs = node_attrs.get(movie_id)
+            if attrs is None:
+                results.append(None)
+                continue
+            buckets = feature_names.get(movie_id)
+            if buckets is None:
+                buckets = {'genres': [], 'directors': [], 'actors': [], 'keywords': [], 'companies': []}
+            results.append({**attrs, **buckets})
+        return results
 
     def get_graph_info(self) -> Dict[str, Any]:
-        """获取知识图谱统计信息"""
+        """获取知识图谱统计信息（初始化后图谱只读，结果算一次就缓存）"""
         if not self.initialized:
             return {}
 
-        return {
-            'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
+        if self._graph_info_cache is not None:
+            return self._graph_info_cache
+
+        self._graph_info_cache = {
+            'total_nodes': len(self._node_attrs),
+            'total_edges': sum(len(neighbors) for neighbors in self._adj.values()) // 2,
             'node_types': {node_type: len(nodes) for node_type, nodes in self.node_types.items()},
             'movie_count': len(self.node_types.get('movie', [])),
             'genre_count': len(self.node_types.get('genre', [])),
@@ -279,17 +461,43 @@ class KnowledgeGraph:
             'keyword_count': len(self.node_types.get('keyword', [])),
             'company_count': len(self.node_types.get('company', []))
         }
+        return self._graph_info_cache
 
     def save_graph(self, filepath: str):
-        """保存知识图谱"""
+        """保存知识图谱
+
+        不再pickle整张NetworkX图（数百万个小字典逐个序列化），
+        而是写成紧凑的npz数组布局：节点属性按列存、邻接存成CSR
+        （indptr/indices），加载时每个节点的邻居就是一段stride-1切片。
+        存成未压缩npz，加载时不用付解压开销。
+        """
         try:
-            graph_data = {
-                'graph': self.graph,
-                'node_types': dict(self.node_types),
-                'initialized': self.initialized
-            }
-            with open(filepath, 'wb') as f:
-                pickle.dump(graph_data, f)
+            nodes = list(self._node_attrs.keys())
+            node_index = {node: i for i, node in enumerate(nodes)}
+            attrs_list = [self._node_attrs[node] for node in nodes]
+
+            # CSR邻接：indptr[i]:indptr[i+1]是第i个节点的邻居区间
+            indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+            indices = []
+            for i, node in enumerate(nodes):
+                neighbors = self._adj.get(node, ())
+                indptr[i + 1] = indptr[i] + len(neighbors)
+                indices.extend(node_index[neighbor] for neighbor in neighbors)
+
+            np.savez(
+                filepath,
+                nodes=np.asarray(nodes),
+                types=np.asarray([a.get('type', 'unknown') for a in attrs_list]),
+                names=np.asarray([a.get('name', '') for a in attrs_list]),
+                titles=np.asarray([a.get('title', '') for a in attrs_list]),
+                years=np.asarray([a.get('year', '') for a in attrs_list]),
+                # 属性值要原样回到API响应里，存float64保证round-trip无损；
+                # 打分用的float32数组由_build_movie_matrix另行构建
+                ratings=np.asarray([a.get('rating', 0.0) for a in attrs_list], dtype=np.float64),
+                popularities=np.asarray([a.get('popularity', 0.0) for a in attrs_list], dtype=np.float64),
+                vote_counts=np.asarray([a.get('vote_count', 0) for a in attrs_list], dtype=np.int32),
+                indptr=indptr,
+                indices=np.asarray(indices, dtype=np.int32))
             print(f"Knowledge graph saved to {filepath}")
             return True
         except Exception as e:
@@ -297,39 +505,83 @@ class KnowledgeGraph:
             return False
 
     def load_graph(self, filepath: str) -> bool:
-        """加载知识图谱"""
+        """加载知识图谱（从npz数组直接重建扁平查询结构，跳过NetworkX）"""
         try:
-            with open(filepath, 'rb') as f:
-                graph_data = pickle.load(f)
-
-            self.graph = graph_data['graph']
-            self.node_types = defaultdict(list, graph_data['node_types'])
-            self.initialized = graph_data['initialized']
+            # npz的成员是zip条目，np.load的mmap_mode对它不生效，
+            # 这里按紧凑数组整块读入后立即重建Python结构
+            data = np.load(filepath, allow_pickle=False)
+            try:
+                nodes = data['nodes'].tolist()
+                types = data['types'].tolist()
+                names = data['names'].tolist()
+                titles = data['titles'].tolist()
+                years = data['years'].tolist()
+                ratings = data['ratings'].tolist()
+                popularities = data['popularities'].tolist()
+                vote_counts = data['vote_counts'].tolist()
+
+                self._node_attrs = {}
+                self.node_types = defaultdict(list)
+                for i, node in enumerate(nodes):
+                    node_type = types[i]
+                    if node_type == 'movie':
+                        attrs = {'type': 'movie',
+                                 'title': titles[i],
+                                 'year': years[i],
+                                 'rating': ratings[i],
+                                 'popularity': popularities[i],
+                                 'vote_count': vote_counts[i]}
+                    else:
+                        attrs = {'type': node_type, 'name': names[i]}
+                    self._node_attrs[node] = attrs
+                    self.node_types[node_type].append(node)
+
+                if 'indptr' in data.files:
+                    # CSR布局：每个节点的邻居是indices里一段连续切片
+                    indptr = data['indptr']
+                    indices = data['indices']
+                    self._adj = {
+                        node: frozenset(nodes[j] for j in indices[indptr[i]:indptr[i + 1]])
+                        for i, node in enumerate(nodes)
+                    }
+                    edge_count = len(indices) // 2
+                else:
+                    # 兼容旧的src/dst边对布局
+                    src = data['src'].tolist()
+                    dst = data['dst'].tolist()
+                    adjacency = {node: set() for node in nodes}
+                    for i, j in zip(src, dst):
+                        adjacency[nodes[i]].add(nodes[j])
+                        adjacency[nodes[j]].add(nodes[i])
+                    self._adj = {node: frozenset(neighbors)
+                                 for node, neighbors in adjacency.items()}
+                    edge_count = len(src)
+            finally:
+                data.close()
+
+            self._build_query_indexes()
+            self.initialized = True
 
             print(f"Knowledge graph loaded from {filepath}")
-            print(f"Loaded {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges")
+            print(f"Loaded {len(nodes)} nodes and {edge_count} edges")
             return True
         except Exception as e:
             print(f"Error loading knowledge graph: {e}")
             return False
 
     def search_movies(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """搜索电影"""
+        """搜索电影（返回预构建的标准化记录的共享引用，调用方不应修改）"""
         if not self.initialized:
             return []
 
-        query = query.lower()
+        query = query.casefold()
         results = []
 
-        for node, attrs in self.graph.nodes(data=True):
-            if attrs.get('type') == 'movie':
-                title = str(attrs.get('title', ''))
-                if query in title.lower():
-                    movie_data = self.get_movie_details(node)
-                    if movie_data:
-                        results.append(movie_data)
-                        if len(results) >= limit:
-                            break
+        for i, (title_norm, _) in enumerate(self._movie_title_list):
+            if query in title_norm:
+                results.append(self._search_records[i])
+                if len(results) >= limit:
+                    break
 
         return results
 
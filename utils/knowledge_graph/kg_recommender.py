@@ -1,32 +1,59 @@
 from typing import List, Dict, Any, Optional
 from .kg_graph import KnowledgeGraph
 from .kg_data_processor import KGDataProcessor
+import logging
+import orjson
 import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
 
 
 class KnowledgeGraphRecommender:
     """知识图谱推荐器"""
 
+    # 固定属性集：去掉每实例__dict__，属性访问走更快的槽位偏移
+    __slots__ = ('config', 'data_processor', 'knowledge_graph', 'initialized',
+                 '_detail_cache', '_detail_json_cache', '_movie_nodes_cache',
+                 '_save_thread', '_system_info_cache')
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.data_processor = KGDataProcessor(config)
         self.knowledge_graph = KnowledgeGraph()
         self.initialized = False
+        # movie_id→标准化详情字典的缓存：图谱初始化后只读，
+        # 重复推荐同一部电影时不再重走图谱遍历和列表切片
+        self._detail_cache = {}
+        # 与_detail_cache同步填充的预序列化JSON字节，
+        # 纯JSON消费方可直接拼接片段，省掉每次请求的重新编码
+        self._detail_json_cache = {}
+        # 电影节点列表的缓存，随机推荐复用同一个列表对象
+        self._movie_nodes_cache = []
+        # 后台保存图谱的线程（构建路径才会用到）
+        self._save_thread = None
+        # 系统信息在初始化后不变，首次调用时构建并缓存
+        self._system_info_cache = None
 
     def initialize(self) -> bool:
         """初始化推荐器"""
         try:
             print("Initializing Knowledge Graph Recommender...")
+            self._detail_cache.clear()
+            self._detail_json_cache.clear()
+            self._system_info_cache = None
 
             # 检查是否已有训练好的模型
             kg_model_file = os.path.join(
                 self.config.get("data_directory", "data"),
-                "kg_model.pkl"
+                "kg_model.npz"
             )
 
             if os.path.exists(kg_model_file):
                 print("Loading pre-built knowledge graph...")
                 if self.knowledge_graph.load_graph(kg_model_file):
+                    self._movie_nodes_cache = list(self.knowledge_graph.node_types.get('movie', []))
                     self.initialized = True
                     print("Knowledge Graph recommender initialized successfully!")
                     return True
@@ -44,10 +71,15 @@ class KnowledgeGraphRecommender:
                 print("Failed to build knowledge graph")
                 return False
 
-            # 保存知识图谱
-            if not self.knowledge_graph.save_graph(kg_model_file):
-                print("Warning: Failed to save knowledge graph")
+            # 保存放到后台线程：磁盘写入与启动的其余工作重叠进行。
+            # 构建完成后图谱不再变更，读取方不需要加锁
+            self._save_thread = threading.Thread(
+                target=self._save_graph_background,
+                args=(kg_model_file,),
+                daemon=True)
+            self._save_thread.start()
 
+            self._movie_nodes_cache = list(self.knowledge_graph.node_types.get('movie', []))
             self.initialized = True
             print("Knowledge Graph recommender initialized successfully!")
 
@@ -64,35 +96,51 @@ class KnowledgeGraphRecommender:
             return True
 
         except Exception as e:
-            print(f"Error initializing Knowledge Graph recommender: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error initializing Knowledge Graph recommender: %s", e)
             return False
 
+    def _save_graph_background(self, kg_model_file: str):
+        """后台线程里保存图谱，失败只记警告不影响服务"""
+        if not self.knowledge_graph.save_graph(kg_model_file):
+            logger.warning("Failed to save knowledge graph to %s", kg_model_file)
+
     def recommend_by_keyword(self, keyword: str, top_n: int = 10) -> List[str]:
         """基于关键词推荐电影"""
         if not self.initialized:
-            print("Knowledge Graph recommender not initialized")
+            logger.warning("Knowledge Graph recommender not initialized")
             return []
 
         try:
             movie_ids = self.knowledge_graph.find_movies_by_keyword(keyword, top_n)
             return movie_ids
         except Exception as e:
-            print(f"Error in keyword recommendation: {e}")
+            logger.exception("Error in keyword recommendation: %s", e)
+            return []
+
+    def recommend_by_keywords(self, keywords: List[str], top_n: int = 10) -> List[str]:
+        """基于多个关键词推荐电影（单次图谱遍历，比逐个关键词调用快）"""
+        if not self.initialized:
+            logger.warning("Knowledge Graph recommender not initialized")
+            return []
+
+        try:
+            movie_ids = self.knowledge_graph.find_movies_by_keywords(keywords, top_n)
+            return movie_ids
+        except Exception as e:
+            logger.exception("Error in multi-keyword recommendation: %s", e)
             return []
 
     def recommend_similar_movies(self, movie_title: str, top_n: int = 10) -> List[str]:
         """基于电影推荐相似电影"""
         if not self.initialized:
-            print("Knowledge Graph recommender not initialized")
+            logger.warning("Knowledge Graph recommender not initialized")
             return []
 
         try:
             movie_ids = self.knowledge_graph.find_similar_movies(movie_title, top_n)
             return movie_ids
         except Exception as e:
-            print(f"Error in similar movie recommendation: {e}")
+            logger.exception("Error in similar movie recommendation: %s", e)
             return []
 
     def get_recommendation_details(self, movie_ids: List[str]) -> List[Dict[str, Any]]:
@@ -101,58 +149,80 @@ class KnowledgeGraphRecommender:
             return []
 
         try:
-            details = []
-            for movie_id in movie_ids:
-                movie_data = self.knowledge_graph.get_movie_details(movie_id)
-                if movie_data:
-                    # 标准化输出格式
-                    standardized_data = {
-                        'movie_id': int(movie_id.split('_')[1]) if '_' in movie_id else None,
-                        'title': movie_data.get('title', 'Unknown'),
-                        'year': movie_data.get('year', 'Unknown'),
-                        'rating': movie_data.get('rating', 0),
-                        'popularity': movie_data.get('popularity', 0),
-                        'vote_count': movie_data.get('vote_count', 0),
-                        'genres': movie_data.get('genres', []),
-                        'directors': movie_data.get('directors', []),
-                        'actors': movie_data.get('actors', [])[:5],  # 限制演员数量
-                        'keywords': movie_data.get('keywords', [])[:5],  # 限制关键词数量
-                        'companies': movie_data.get('companies', [])[:3],  # 限制制作公司数量
-                        'type': 'knowledge_graph_recommendation',
-                        'score': 1.0  # 知识图谱默认分数
-                    }
-                    details.append(standardized_data)
-
-            return details
+            cache = self._detail_cache
+
+            # 缓存未命中的ID一次批量取详情，不再逐个调用图谱方法
+            missing = [movie_id for movie_id in movie_ids if movie_id not in cache]
+            if missing:
+                # 属性链和方法绑定提到循环外，循环体内只剩局部变量访问
+                int_ids = self.knowledge_graph.movie_node_to_int_id
+                standardize = self._standardize_recommendation
+                batch = self.knowledge_graph.get_movie_details_batch(missing)
+                for movie_id, movie_data in zip(missing, batch):
+                    if movie_data:
+                        # 标准化输出格式（缓存后同一部电影只构建一次，
+                        # JSON字节也在此一并预序列化）
+                        standardized = standardize(int_ids.get(movie_id), movie_data)
+                        cache[movie_id] = standardized
+                        self._detail_json_cache[movie_id] = orjson.dumps(standardized)
+
+            return [cache[movie_id] for movie_id in movie_ids if movie_id in cache]
         except Exception as e:
-            print(f"Error getting recommendation details: {e}")
+            logger.exception("Error getting recommendation details: %s", e)
             return []
 
+    def get_recommendation_details_json(self, movie_ids: List[str]) -> bytes:
+        """获取推荐详情的JSON字节串
+
+        直接拼接缓存里的预序列化片段，完全绕过每次请求的JSON编码；
+        字典版的get_recommendation_details保持不变。
+        """
+        if not self.initialized:
+            return b'[]'
+
+        try:
+            # 确保缓存已填充（包括JSON字节）
+            self.get_recommendation_details(movie_ids)
+            json_cache = self._detail_json_cache
+            parts = [json_cache[movie_id] for movie_id in movie_ids if movie_id in json_cache]
+            return b'[' + b','.join(parts) + b']'
+        except Exception as e:
+            logger.exception("Error getting recommendation details JSON: %s", e)
+            return b'[]'
+
+    @staticmethod
+    def _standardize_recommendation(int_id: Optional[int], movie_data: Dict[str, Any]) -> Dict[str, Any]:
+        """把图谱详情转换成标准化的推荐输出格式"""
+        mget = movie_data.get
+        actors = mget('actors') or []
+        keywords = mget('keywords') or []
+        companies = mget('companies') or []
+        return {
+            'movie_id': int_id,
+            'title': mget('title', 'Unknown'),
+            'year': mget('year', 'Unknown'),
+            'rating': mget('rating', 0),
+            'popularity': mget('popularity', 0),
+            'vote_count': mget('vote_count', 0),
+            'genres': mget('genres', []),
+            'directors': mget('directors', []),
+            'actors': actors[:5] if len(actors) > 5 else actors,  # 限制演员数量
+            'keywords': keywords[:5] if len(keywords) > 5 else keywords,  # 限制关键词数量
+            'companies': companies[:3] if len(companies) > 3 else companies,  # 限制制作公司数量
+            'type': 'knowledge_graph_recommendation',
+            'score': 1.0  # 知识图谱默认分数
+        }
+
     def search_movies(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """搜索电影"""
         if not self.initialized:
             return []
 
         try:
-            results = self.knowledge_graph.search_movies(query, limit)
-
-            # 标准化输出格式
-            standardized_results = []
-            for movie_data in results:
-                standardized_data = {
-                    'movie_id': int(movie_data.get('movie_id', 0)) if movie_data.get('movie_id') else None,
-                    'title': movie_data.get('title', 'Unknown'),
-                    'year': movie_data.get('year', 'Unknown'),
-                    'rating': movie_data.get('rating', 0),
-                    'popularity': movie_data.get('popularity', 0),
-                    'vote_count': movie_data.get('vote_count', 0),
-                    'type': 'knowledge_graph_search'
-                }
-                standardized_results.append(standardized_data)
-
-            return standardized_results
+            # 图谱返回的已是预构建的标准化记录，直接透传
+            return self.knowledge_graph.search_movies(query, limit)
         except Exception as e:
-            print(f"Error searching movies: {e}")
+            logger.exception("Error searching movies: %s", e)
             return []
 
     def get_movie_details(self, movie_title: str) -> Optional[Dict[str, Any]]:
@@ -161,46 +231,51 @@ class KnowledgeGraphRecommender:
             return None
 
         try:
-            movie_node = self.knowledge_graph.find_movie_by_title(movie_title)
+            kg = self.knowledge_graph
+            movie_node = kg.find_movie_by_title(movie_title)
             if not movie_node:
                 return None
 
-            movie_data = self.knowledge_graph.get_movie_details(movie_node)
+            movie_data = kg.get_movie_details(movie_node)
             if not movie_data:
                 return None
 
             # 标准化输出格式
+            mget = movie_data.get
             standardized_data = {
-                'movie_id': int(movie_node.split('_')[1]) if '_' in movie_node else None,
-                'title': movie_data.get('title', 'Unknown'),
-                'year': movie_data.get('year', 'Unknown'),
-                'rating': movie_data.get('rating', 0),
-                'popularity': movie_data.get('popularity', 0),
-                'vote_count': movie_data.get('vote_count', 0),
-                'genres': movie_data.get('genres', []),
-                'directors': movie_data.get('directors', []),
-                'actors': movie_data.get('actors', []),
-                'keywords': movie_data.get('keywords', []),
-                'companies': movie_data.get('companies', []),
+                'movie_id': kg.movie_node_to_int_id.get(movie_node),
+                'title': mget('title', 'Unknown'),
+                'year': mget('year', 'Unknown'),
+                'rating': mget('rating', 0),
+                'popularity': mget('popularity', 0),
+                'vote_count': mget('vote_count', 0),
+                'genres': mget('genres', []),
+                'directors': mget('directors', []),
+                'actors': mget('actors', []),
+                'keywords': mget('keywords', []),
+                'companies': mget('companies', []),
                 'type': 'knowledge_graph_details'
             }
 
             return standardized_data
         except Exception as e:
-            print(f"Error getting movie details: {e}")
+            logger.exception("Error getting movie details: %s", e)
             return None
 
     def get_system_info(self) -> Dict[str, Any]:
-        """获取系统信息"""
+        """获取系统信息（初始化后不变，构建一次后直接返回缓存）"""
         if not self.initialized:
             return {
                 'initialized': False,
                 'error': 'Knowledge Graph recommender not initialized'
             }
 
+        if self._system_info_cache is not None:
+            return self._system_info_cache
+
         try:
             graph_info = self.knowledge_graph.get_graph_info()
-            return {
+            self._system_info_cache = {
                 'method': 'Knowledge Graph-based Recommendation',
                 'initialized': True,
                 'graph_statistics': graph_info,
@@ -219,6 +294,7 @@ class KnowledgeGraphRecommender:
                     'Cross-domain connections (actor-director, etc.)'
                 ]
             }
+            return self._system_info_cache
         except Exception as e:
             return {
                 'initialized': False,
@@ -231,21 +307,16 @@ class KnowledgeGraphRecommender:
             return []
 
         try:
-            import random
-            movie_nodes = self.knowledge_graph.node_types.get('movie', [])
+            movie_nodes = self._movie_nodes_cache
             if not movie_nodes:
                 return []
 
-            # 随机选择电影
-            selected_nodes = random.sample(
-                min(movie_nodes, n),
-                min(len(movie_nodes), n)
-            )
+            # 随机选择电影（旧实现把列表和整数传给min，一调用就会抛TypeError）
+            selected_nodes = random.sample(movie_nodes, min(len(movie_nodes), n))
 
             # 获取详细信息
-            movie_ids = [node for node in selected_nodes]
-            return self.get_recommendation_details(movie_ids)
+            return self.get_recommendation_details(selected_nodes)
         except Exception as e:
-            print(f"Error getting random movies: {e}")
+            logger.exception("Error getting random movies: %s", e)
             return []
 